@@ -0,0 +1,41 @@
+"""Add composite (search_space_id, id) index to documents table
+
+Revision ID: 9
+Revises: 8
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9'
+down_revision: Union[str, None] = '8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Serves the per-search-space document listing (filter on search_space_id, order by id).
+    # Built CONCURRENTLY so the documents table stays writable, which can't run in a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_documents_search_space_id_id',
+            'documents',
+            ['search_space_id', 'id'],
+            unique=False,
+            postgresql_include=['title', 'document_type', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_documents_search_space_id_id',
+            table_name='documents',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -1,4 +1,5 @@
 from contextlib import asynccontextmanager
+import asyncio
 
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,7 +11,9 @@ from app.schemas import UserCreate, UserRead, UserUpdate
 
 
 from app.routes import router as crud_router
+from app.routes.documents_routes import shutdown_unstructured_pool
 from app.config import config
+from app.tasks.document_queue import start_document_workers, stop_document_workers
 
 from app.users import (
     SECRET,
@@ -24,7 +27,11 @@ from app.users import (
 async def lifespan(app: FastAPI):
     # Not needed if you setup a migration system like Alembic
     await create_db_and_tables()
+    document_workers = start_document_workers()
     yield
+    await stop_document_workers(document_workers)
+    # Let in-flight parses finish, then stop the Unstructured worker processes
+    await asyncio.to_thread(shutdown_unstructured_pool)
 
 
 app = FastAPI(lifespan=lifespan)
@@ -111,6 +111,12 @@ class Config:
     # Firecrawl API Key
     FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY", None) 
     
+    # Document processing queue workers (defaults to the DB connection pool size)
+    DOCUMENT_WORKER_COUNT = os.getenv("DOCUMENT_WORKER_COUNT")
+    
+    # Unstructured parser worker processes; each one loads its own copy of the models
+    UNSTRUCTURED_WORKER_COUNT = os.getenv("UNSTRUCTURED_WORKER_COUNT")
+    
     # Litellm TTS Configuration
     TTS_SERVICE = os.getenv("TTS_SERVICE")
     TTS_SERVICE_API_BASE = os.getenv("TTS_SERVICE_API_BASE")
@@ -11,6 +11,7 @@ from sqlalchemy import (
     Column,
     Enum as SQLAlchemyEnum,
     ForeignKey,
+    Index,
     Integer,
     JSON,
     String,
@@ -93,6 +94,15 @@ class Chat(BaseModel, TimestampMixin):
 
 class Document(BaseModel, TimestampMixin):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Per-search-space listing: filter on search_space_id, ordered by id
+        Index(
+            "ix_documents_search_space_id_id",
+            "search_space_id",
+            "id",
+            postgresql_include=["title", "document_type", "created_at"],
+        ),
+    )
     
     title = Column(String, nullable=False, index=True)
     document_type = Column(SQLAlchemyEnum(DocumentType), nullable=False)
@@ -168,7 +178,8 @@ else:
         search_source_connectors = relationship("SearchSourceConnector", back_populates="user")
 
 
-engine = create_async_engine(DATABASE_URL)
+# Room for every distinct statement the app issues, so compiled SQL stays cached across requests
+engine = create_async_engine(DATABASE_URL, query_cache_size=1200)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
         
 
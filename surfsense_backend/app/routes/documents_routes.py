@@ -1,65 +1,148 @@
 from litellm import atranscription
 from fastapi import APIRouter, Depends, BackgroundTasks, UploadFile, Form, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Integer, bindparam, delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
-from app.db import get_async_session, User, SearchSpace, Document, DocumentType
+from sqlalchemy.orm import load_only, raiseload
+from typing import List, Optional
+from app.db import get_async_session, User, SearchSpace, Document, DocumentType, async_session_maker
 from app.schemas import DocumentsCreate, DocumentUpdate, DocumentRead
 from app.users import current_active_user
-from app.utils.check_ownership import check_ownership
+from app.utils.check_ownership import check_search_space_ownership
+from app.utils.unstructured_loader import load_file_with_unstructured
 from app.tasks.background_tasks import add_received_markdown_file_document, add_extension_received_document, add_received_file_document_using_unstructured, add_crawled_url_document, add_youtube_video_document, add_received_file_document_using_llamacloud
+from app.tasks.document_queue import DOCUMENT_WORKER_COUNT, enqueue_document_job
 from app.config import config as app_config
-# Force asyncio to use standard event loop before unstructured imports
+import aiofiles
 import asyncio
-try:
-    asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
-except RuntimeError:
-    pass
+import logging
+import multiprocessing
+import orjson
 import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+# Stop unstructured from trying to nest_asyncio-patch the running (uvloop) loop;
+# its blocking loader is run in a worker process instead
 os.environ["UNSTRUCTURED_HAS_PATCHED_LOOP"] = "1"
 
+# Set up logging
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Size of each read when streaming an uploaded file to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Maximum bytes handed to a single os.sendfile call when copying an upload
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024
+# Maximum number of files from one upload request copied to disk at the same time
+UPLOAD_CONCURRENCY = 8
+
+# Unstructured parser processes. Each worker loads its own copy of the models, and
+# os.cpu_count() reports the host's cores inside a container, so keep this small.
+UNSTRUCTURED_WORKER_COUNT = max(1, int(app_config.UNSTRUCTURED_WORKER_COUNT or 2))
+
+
+def _new_unstructured_pool() -> ProcessPoolExecutor:
+    # Workers are spawned (not forked) so they don't inherit the server's threads
+    return ProcessPoolExecutor(
+        max_workers=UNSTRUCTURED_WORKER_COUNT,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# CPU-bound Unstructured parsing runs here so it can't block the event loop.
+# Replaced by parse_file_with_unstructured when a worker dies and breaks it.
+UNSTRUCTURED_POOL = _new_unstructured_pool()
+_unstructured_pool_lock = asyncio.Lock()
+
+# Columns serialized by DocumentRead; the embedding vector and content hash are never sent
+_DOCUMENT_READ_COLUMNS = (
+    Document.id,
+    Document.title,
+    Document.document_type,
+    Document.document_metadata,
+    Document.content,
+    Document.created_at,
+    Document.search_space_id,
+)
+
+# Document queries are built once at import time; handlers only bind values.
+# The read statements load only what DocumentRead needs and forbid any other
+# column or relationship load outright rather than risk a lazy SELECT per row.
+_DOCS_LIST_STMT = (
+    select(Document)
+    .join(SearchSpace)
+    .where(SearchSpace.user_id == bindparam("uid"))
+    .options(load_only(*_DOCUMENT_READ_COLUMNS, raiseload=True), raiseload("*"))
+    .order_by(Document.id)
+    .offset(bindparam("skip", type_=Integer))
+    .limit(bindparam("limit", type_=Integer))
+)
+_DOCS_LIST_BY_SEARCH_SPACE_STMT = _DOCS_LIST_STMT.where(
+    Document.search_space_id == bindparam("search_space_id")
+)
+_DOC_BY_ID_STMT = (
+    select(Document)
+    .join(SearchSpace)
+    .where(Document.id == bindparam("doc_id"), SearchSpace.user_id == bindparam("uid"))
+    .options(load_only(*_DOCUMENT_READ_COLUMNS, raiseload=True), raiseload("*"))
+)
+# Ownership check, update and reload in one round-trip; SET values are added per request
+_UPDATE_DOC_STMT = (
+    update(Document)
+    .where(
+        Document.id == bindparam("doc_id"),
+        Document.search_space_id.in_(
+            select(SearchSpace.id).where(SearchSpace.user_id == bindparam("uid"))
+        ),
+    )
+    .returning(*_DOCUMENT_READ_COLUMNS)
+    .execution_options(synchronize_session=False)
+)
+# Ownership check and delete in one round-trip; chunks go via the FK's ON DELETE CASCADE
+_DELETE_DOC_STMT = (
+    delete(Document)
+    .where(
+        Document.id == bindparam("doc_id"),
+        Document.search_space_id.in_(
+            select(SearchSpace.id).where(SearchSpace.user_id == bindparam("uid"))
+        ),
+    )
+    .returning(Document.id)
+    .execution_options(synchronize_session=False)
+)
+
 
 @router.post("/documents/")
 async def create_documents(
     request: DocumentsCreate,
     session: AsyncSession = Depends(get_async_session),
-    user: User = Depends(current_active_user),
-    fastapi_background_tasks: BackgroundTasks = BackgroundTasks()
+    user: User = Depends(current_active_user)
 ):
     try:
         # Check if the user owns the search space
-        await check_ownership(session, SearchSpace, request.search_space_id, user)
+        await check_search_space_ownership(session, request.search_space_id, user)
 
         if request.document_type == DocumentType.EXTENSION:
-            for individual_document in request.content:
-                fastapi_background_tasks.add_task(
-                    process_extension_document_with_new_session,
-                    individual_document,
-                    request.search_space_id
-                )
+            process_batch = process_extension_documents_with_new_session
         elif request.document_type == DocumentType.CRAWLED_URL:
-            for url in request.content:
-                fastapi_background_tasks.add_task(
-                    process_crawled_url_with_new_session,
-                    url,
-                    request.search_space_id
-                )
+            process_batch = process_crawled_urls_with_new_session
         elif request.document_type == DocumentType.YOUTUBE_VIDEO:
-            for url in request.content:
-                fastapi_background_tasks.add_task(
-                    process_youtube_video_with_new_session,
-                    url,
-                    request.search_space_id
-                )
+            process_batch = process_youtube_videos_with_new_session
         else:
             raise HTTPException(
                 status_code=400,
                 detail="Invalid document type"
             )
 
+        # Spread the items over the queue workers so they are processed in parallel,
+        # while each batch still shares a single DB session
+        for batch in split_into_batches(request.content, DOCUMENT_WORKER_COUNT):
+            await enqueue_document_job(process_batch, batch, request.search_space_id)
+
         await session.commit()
         return {"message": "Documents processed successfully"}
     except HTTPException:
@@ -81,38 +164,41 @@ async def create_documents(
     fastapi_background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     try:
-        await check_ownership(session, SearchSpace, search_space_id, user)
+        await check_search_space_ownership(session, search_space_id, user)
 
         if not files:
             raise HTTPException(status_code=400, detail="No files provided")
 
-        for file in files:
-            try:
-                # Save file to a temporary location to avoid stream issues
-                import tempfile
-                import aiofiles
-                import os
-
-                # Create temp file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-                    temp_path = temp_file.name
-
-                # Write uploaded file to temp file
-                content = await file.read()
-                with open(temp_path, "wb") as f:
-                    f.write(content)
-         
-                fastapi_background_tasks.add_task(
-                    process_file_in_background_with_new_session,
-                    temp_path,
-                    file.filename,
-                    search_space_id
-                )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=422,
-                    detail=f"Failed to process file {file.filename}: {str(e)}"
-                )
+        # Copy the uploads to disk concurrently, bounded so a large batch can't
+        # exhaust the thread pool or file descriptors
+        upload_semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        save_tasks = []
+        try:
+            # A failed save cancels the ones still running
+            async with asyncio.TaskGroup() as task_group:
+                for file in files:
+                    save_tasks.append(task_group.create_task(
+                        save_upload_to_temp_file(file, upload_semaphore)
+                    ))
+        except BaseException as error:
+            # A failed save or a cancelled request (client disconnect, shutdown) leaves
+            # nothing to process the files that were already saved, so remove them
+            for task in save_tasks:
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    os.unlink(task.result())
+            if isinstance(error, ExceptionGroup):
+                raise error.exceptions[0]
+            raise
+
+        temp_paths = [task.result() for task in save_tasks]
+
+        for file, temp_path in zip(files, temp_paths):
+            fastapi_background_tasks.add_task(
+                process_file_in_background_with_new_session,
+                temp_path,
+                file.filename,
+                search_space_id
+            )
 
         await session.commit()
         return {"message": "Files uploaded for processing"}
@@ -126,6 +212,63 @@ async def create_documents(
         )
 
 
+async def save_upload_to_temp_file(file: UploadFile, semaphore: asyncio.Semaphore) -> str:
+    """Save an uploaded file to a new temporary file and return its path."""
+    async with semaphore:
+        temp_path = None
+        try:
+            # Save file to a temporary location to avoid stream issues, writing
+            # through the descriptor from mkstemp so the file is opened only once
+            temp_fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(file.filename)[1])
+
+            if sys.platform.startswith("linux"):
+                # Let the kernel copy the spooled upload straight into the temp file
+                copy = asyncio.ensure_future(
+                    asyncio.to_thread(copy_upload_with_sendfile, file.file, temp_fd)
+                )
+                try:
+                    await asyncio.shield(copy)
+                except asyncio.CancelledError:
+                    # The copy thread can't be interrupted; let it finish and close the
+                    # descriptor before the file is removed and the upload is closed
+                    await asyncio.wait([copy])
+                    # Nobody is left to report a failed copy to; retrieve it so asyncio
+                    # doesn't log it as never retrieved
+                    if not copy.cancelled():
+                        copy.exception()
+                    raise
+            else:
+                # Stream the upload to the temp file in fixed-size chunks so the
+                # whole file is never held in memory and writes stay off the event loop
+                async with aiofiles.open(temp_fd, "wb") as out_file:
+                    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                        await out_file.write(chunk)
+
+            return temp_path
+        except asyncio.CancelledError:
+            if temp_path:
+                os.unlink(temp_path)
+            raise
+        except Exception as e:
+            if temp_path:
+                os.unlink(temp_path)
+            raise HTTPException(
+                status_code=422,
+                detail=f"Failed to process file {file.filename}: {str(e)}"
+            )
+
+
+def copy_upload_with_sendfile(source, destination_fd: int):
+    """Copy an uploaded file object into destination_fd with os.sendfile and close it (Linux only)."""
+    with open(destination_fd, "wb") as destination:
+        # fileno() rolls a small in-memory spooled upload over to disk first
+        source.seek(0)
+        source_fd = source.fileno()
+        offset = 0
+        while sent := os.sendfile(destination.fileno(), source_fd, offset, SENDFILE_CHUNK_SIZE):
+            offset += sent
+
+
 async def process_file_in_background(
     file_path: str,
     filename: str,
@@ -140,7 +283,6 @@ async def process_file_in_background(
                 markdown_content = f.read()
 
             # Clean up the temp file
-            import os
             try:
                 os.unlink(file_path)
             except:
@@ -191,23 +333,10 @@ async def process_file_in_background(
             )
         else:
             if app_config.ETL_SERVICE == "UNSTRUCTURED":
-                from langchain_unstructured import UnstructuredLoader
-                
-                # Process the file
-                loader = UnstructuredLoader(
-                    file_path,
-                    mode="elements",
-                    post_processors=[],
-                    languages=["eng"],
-                    include_orig_elements=False,
-                    include_metadata=False,
-                    strategy="auto",
-                )
-
-                docs = await loader.aload()
+                # Process the file in the worker pool
+                docs = await parse_file_with_unstructured(file_path)
 
                 # Clean up the temp file
-                import os
                 try:
                     os.unlink(file_path)
                 except:
@@ -238,7 +367,6 @@ async def process_file_in_background(
                 result = await parser.aparse(file_path)
                 
                 # Clean up the temp file
-                import os
                 try:
                     os.unlink(file_path)
                 except:
@@ -259,11 +387,10 @@ async def process_file_in_background(
                         search_space_id=search_space_id
                     )
     except Exception as e:
-        import logging
-        logging.error(f"Error processing file in background: {str(e)}")
+        logger.error(f"Error processing file in background: {str(e)}")
 
 
-@router.get("/documents/", response_model=List[DocumentRead])
+@router.get("/documents/", response_model=List[DocumentRead], response_class=ORJSONResponse)
 async def read_documents(
     skip: int = 0,
     limit: int = 300,
@@ -272,38 +399,90 @@ async def read_documents(
     user: User = Depends(current_active_user)
 ):
     try:
-        query = select(Document).join(SearchSpace).filter(
-            SearchSpace.user_id == user.id)
+        query, params = documents_list_query(user, skip, limit, search_space_id)
 
-        # Filter by search_space_id if provided
-        if search_space_id is not None:
-            query = query.filter(Document.search_space_id == search_space_id)
+        result = await session.execute(query, params)
+        db_documents = result.scalars().all()
 
-        result = await session.execute(
-            query.offset(skip).limit(limit)
+        # Convert database objects to API-friendly format and serialize with orjson
+        # directly, skipping FastAPI's second validation pass over response_model
+        return ORJSONResponse(
+            [DocumentRead.model_validate(doc).model_dump(mode="json") for doc in db_documents]
         )
-        db_documents = result.scalars().all()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch documents: {str(e)}"
+        )
+
 
-        # Convert database objects to API-friendly format
-        api_documents = []
-        for doc in db_documents:
-            api_documents.append(DocumentRead(
-                id=doc.id,
-                title=doc.title,
-                document_type=doc.document_type,
-                document_metadata=doc.document_metadata,
-                content=doc.content,
-                created_at=doc.created_at,
-                search_space_id=doc.search_space_id
-            ))
-
-        return api_documents
+@router.get("/documents/stream")
+async def stream_documents(
+    skip: int = 0,
+    limit: int = 300,
+    search_space_id: int = None,
+    user: User = Depends(current_active_user)
+):
+    """Same listing as GET /documents/, streamed as newline-delimited JSON one row at a time."""
+    query, params = documents_list_query(user, skip, limit, search_space_id)
+
+    async def generate():
+        # The generator outlives the request's dependencies, so it owns its session
+        async with async_session_maker() as session:
+            try:
+                result = await session.stream_scalars(query, params)
+                async for doc in result:
+                    yield orjson.dumps(DocumentRead.model_validate(doc).model_dump(mode="json")) + b"\n"
+            except Exception as e:
+                # Re-raise so a mid-stream failure aborts the response instead of
+                # ending it cleanly and looking like a complete listing
+                logger.error(f"Error streaming documents: {str(e)}")
+                raise
+
+    # Fetch the first row before committing to a 200, so a query that fails
+    # up front gets the same 500 as GET /documents/
+    lines = generate()
+    try:
+        first_line = await anext(lines, None)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch documents: {str(e)}"
         )
 
+    async def stream():
+        if first_line is None:
+            return
+        yield first_line
+        async for line in lines:
+            yield line
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def documents_list_query(user: User, skip: int, limit: int, search_space_id: Optional[int]):
+    """Pick the precompiled list statement and its bind values for a documents listing."""
+    params = {"uid": user.id, "skip": skip, "limit": limit}
+
+    # Filter by search_space_id if provided
+    if search_space_id is not None:
+        params["search_space_id"] = search_space_id
+        return _DOCS_LIST_BY_SEARCH_SPACE_STMT, params
+
+    return _DOCS_LIST_STMT, params
+
+
+async def get_owned_document(
+    session: AsyncSession,
+    document_id: int,
+    user: User
+) -> Optional[Document]:
+    """Fetch a document by id if it belongs to one of the user's search spaces."""
+    result = await session.execute(
+        _DOC_BY_ID_STMT, {"doc_id": document_id, "uid": user.id}
+    )
+    return result.scalars().first()
+
 
 @router.get("/documents/{document_id}", response_model=DocumentRead)
 async def read_document(
@@ -312,12 +491,7 @@ async def read_document(
     user: User = Depends(current_active_user)
 ):
     try:
-        result = await session.execute(
-            select(Document)
-            .join(SearchSpace)
-            .filter(Document.id == document_id, SearchSpace.user_id == user.id)
-        )
-        document = result.scalars().first()
+        document = await get_owned_document(session, document_id, user)
 
         if not document:
             raise HTTPException(
@@ -326,15 +500,9 @@ async def read_document(
             )
 
         # Convert database object to API-friendly format
-        return DocumentRead(
-            id=document.id,
-            title=document.title,
-            document_type=document.document_type,
-            document_metadata=document.document_metadata,
-            content=document.content,
-            created_at=document.created_at,
-            search_space_id=document.search_space_id
-        )
+        return DocumentRead.model_validate(document)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -350,36 +518,23 @@ async def update_document(
     user: User = Depends(current_active_user)
 ):
     try:
-        # Query the document directly instead of using read_document function
+        update_data = document_update.model_dump(exclude_unset=True)
         result = await session.execute(
-            select(Document)
-            .join(SearchSpace)
-            .filter(Document.id == document_id, SearchSpace.user_id == user.id)
+            _UPDATE_DOC_STMT.values(**update_data),
+            {"doc_id": document_id, "uid": user.id}
         )
-        db_document = result.scalars().first()
+        db_document = result.one_or_none()
 
-        if not db_document:
+        if db_document is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Document with id {document_id} not found"
             )
 
-        update_data = document_update.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_document, key, value)
         await session.commit()
-        await session.refresh(db_document)
 
         # Convert to DocumentRead for response
-        return DocumentRead(
-            id=db_document.id,
-            title=db_document.title,
-            document_type=db_document.document_type,
-            document_metadata=db_document.document_metadata,
-            content=db_document.content,
-            created_at=db_document.created_at,
-            search_space_id=db_document.search_space_id
-        )
+        return DocumentRead.model_validate(db_document)
     except HTTPException:
         raise
     except Exception as e:
@@ -397,21 +552,16 @@ async def delete_document(
     user: User = Depends(current_active_user)
 ):
     try:
-        # Query the document directly instead of using read_document function
         result = await session.execute(
-            select(Document)
-            .join(SearchSpace)
-            .filter(Document.id == document_id, SearchSpace.user_id == user.id)
+            _DELETE_DOC_STMT, {"doc_id": document_id, "uid": user.id}
         )
-        document = result.scalars().first()
 
-        if not document:
+        if result.scalar() is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Document with id {document_id} not found"
             )
 
-        await session.delete(document)
         await session.commit()
         return {"message": "Document deleted successfully"}
     except HTTPException:
@@ -424,34 +574,69 @@ async def delete_document(
         )
 
 
-async def process_extension_document_with_new_session(
-    individual_document,
-    search_space_id: int
-):
-    """Create a new session and process extension document."""
-    from app.db import async_session_maker
+async def parse_file_with_unstructured(file_path: str):
+    """
+    Parse a file in the Unstructured worker pool.
 
-    async with async_session_maker() as session:
+    A worker that dies (e.g. OOM-killed on a large scan) breaks the whole pool, so
+    the pool is replaced and the file retried once on a fresh one.
+    """
+    for attempt in range(2):
+        pool = UNSTRUCTURED_POOL
         try:
-            await add_extension_received_document(session, individual_document, search_space_id)
-        except Exception as e:
-            import logging
-            logging.error(f"Error processing extension document: {str(e)}")
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, load_file_with_unstructured, file_path
+            )
+        except BrokenProcessPool:
+            await _replace_broken_unstructured_pool(pool)
+            if attempt:
+                raise
+
+
+async def _replace_broken_unstructured_pool(broken_pool: ProcessPoolExecutor):
+    global UNSTRUCTURED_POOL
+    async with _unstructured_pool_lock:
+        # Parses that failed on the same broken pool only rebuild it once
+        if UNSTRUCTURED_POOL is broken_pool:
+            logger.warning("Unstructured worker pool broke; starting a new one")
+            UNSTRUCTURED_POOL = _new_unstructured_pool()
+            broken_pool.shutdown(wait=False)
+
+
+def shutdown_unstructured_pool():
+    """Let in-flight parses finish, then stop the Unstructured worker processes."""
+    UNSTRUCTURED_POOL.shutdown()
+
 
+def split_into_batches(items: list, batch_count: int) -> List[list]:
+    """Deal items round-robin into at most batch_count non-empty batches."""
+    return [items[i::batch_count] for i in range(min(batch_count, len(items)))]
 
-async def process_crawled_url_with_new_session(
-    url: str,
+
+async def process_extension_documents_with_new_session(
+    documents: list,
     search_space_id: int
 ):
-    """Create a new session and process crawled URL."""
-    from app.db import async_session_maker
+    """Create a new session and process a batch of extension documents."""
+    async with async_session_maker() as session:
+        for individual_document in documents:
+            try:
+                await add_extension_received_document(session, individual_document, search_space_id)
+            except Exception as e:
+                logger.error(f"Error processing extension document: {str(e)}")
+
 
+async def process_crawled_urls_with_new_session(
+    urls: List[str],
+    search_space_id: int
+):
+    """Create a new session and process a batch of crawled URLs."""
     async with async_session_maker() as session:
-        try:
-            await add_crawled_url_document(session, url, search_space_id)
-        except Exception as e:
-            import logging
-            logging.error(f"Error processing crawled URL: {str(e)}")
+        for url in urls:
+            try:
+                await add_crawled_url_document(session, url, search_space_id)
+            except Exception as e:
+                logger.error(f"Error processing crawled URL: {str(e)}")
 
 
 async def process_file_in_background_with_new_session(
@@ -460,24 +645,20 @@ async def process_file_in_background_with_new_session(
     search_space_id: int
 ):
     """Create a new session and process file."""
-    from app.db import async_session_maker
-
     async with async_session_maker() as session:
         await process_file_in_background(file_path, filename, search_space_id, session)
 
 
-async def process_youtube_video_with_new_session(
-    url: str,
+async def process_youtube_videos_with_new_session(
+    urls: List[str],
     search_space_id: int
 ):
-    """Create a new session and process YouTube video."""
-    from app.db import async_session_maker
-
+    """Create a new session and process a batch of YouTube videos."""
     async with async_session_maker() as session:
-        try:
-            await add_youtube_video_document(session, url, search_space_id)
-        except Exception as e:
-            import logging
-            logging.error(f"Error processing YouTube video: {str(e)}")
+        for url in urls:
+            try:
+                await add_youtube_video_document(session, url, search_space_id)
+            except Exception as e:
+                logger.error(f"Error processing YouTube video: {str(e)}")
 
 
@@ -5,7 +5,7 @@ from typing import List
 from app.db import get_async_session, User, SearchSpace
 from app.schemas import SearchSpaceCreate, SearchSpaceUpdate, SearchSpaceRead
 from app.users import current_active_user
-from app.utils.check_ownership import check_ownership
+from app.utils.check_ownership import check_ownership, forget_search_space_ownership
 from fastapi import HTTPException
 
 router = APIRouter()
@@ -104,6 +104,7 @@ async def delete_search_space(
         db_search_space = await check_ownership(session, SearchSpace, search_space_id, user)
         await session.delete(db_search_space)
         await session.commit()
+        forget_search_space_ownership(search_space_id, user)
         return {"message": "Search space deleted successfully"}
     except HTTPException:
         raise
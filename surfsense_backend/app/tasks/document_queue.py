@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, List
+
+from app.config import config
+from app.db import engine
+
+logger = logging.getLogger(__name__)
+
+# Number of long-lived workers draining the document queue. Each worker holds a DB
+# session while it runs, so by default stay within the engine's base pool size and
+# leave the overflow connections to request handlers. Never fewer than one worker,
+# or queued documents would never be processed.
+DOCUMENT_WORKER_COUNT = max(
+    1, int(config.DOCUMENT_WORKER_COUNT or min(os.cpu_count() or 1, engine.pool.size()))
+)
+
+# Seconds to wait on shutdown for queued and running jobs before cancelling them
+DOCUMENT_QUEUE_DRAIN_TIMEOUT = 60
+
+# Pending document processing jobs as (coroutine function, args) pairs
+document_queue: asyncio.Queue = asyncio.Queue()
+
+# Jobs taken off the queue that have not finished yet
+_running_jobs = 0
+
+
+async def enqueue_document_job(func: Callable[..., Awaitable[Any]], *args: Any):
+    """Queue a document processing coroutine to be run by the next free worker."""
+    await document_queue.put((func, args))
+
+
+async def _document_worker():
+    global _running_jobs
+    while True:
+        func, args = await document_queue.get()
+        _running_jobs += 1
+        try:
+            await func(*args)
+        except Exception as e:
+            logger.error(f"Error running queued document job: {str(e)}")
+        finally:
+            _running_jobs -= 1
+            document_queue.task_done()
+
+
+def start_document_workers() -> List[asyncio.Task]:
+    """Spawn the document queue workers on the running event loop."""
+    return [
+        asyncio.create_task(_document_worker())
+        for _ in range(DOCUMENT_WORKER_COUNT)
+    ]
+
+
+async def stop_document_workers(workers: List[asyncio.Task]):
+    """Let the workers finish the queued jobs, then cancel them and wait for them to exit."""
+    try:
+        await asyncio.wait_for(document_queue.join(), DOCUMENT_QUEUE_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Document queue not drained after {DOCUMENT_QUEUE_DRAIN_TIMEOUT}s; dropping "
+            f"{_running_jobs} running and {document_queue.qsize()} queued document jobs"
+        )
+
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
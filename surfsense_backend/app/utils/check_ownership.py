@@ -1,7 +1,12 @@
+from cachetools import TTLCache
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.db import User
+from app.db import User, SearchSpace
+
+# Recently verified (user id, search space id) pairs. A search space never changes
+# owner, so an entry can only go stale when the space is deleted.
+_search_space_ownership_cache = TTLCache(maxsize=1024, ttl=60)
 
 # Helper function to check user ownership
 async def check_ownership(session: AsyncSession, model, item_id: int, user: User):
@@ -9,4 +14,15 @@ async def check_ownership(session: AsyncSession, model, item_id: int, user: User
     item = item.scalars().first()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found or you don't have permission to access it")
-    return item 
\ No newline at end of file
+    return item
+
+# Ownership check for routes that only need a yes/no answer, skipping the SELECT on a cache hit
+async def check_search_space_ownership(session: AsyncSession, search_space_id: int, user: User):
+    key = (user.id, search_space_id)
+    if key in _search_space_ownership_cache:
+        return
+    await check_ownership(session, SearchSpace, search_space_id, user)
+    _search_space_ownership_cache[key] = True
+
+def forget_search_space_ownership(search_space_id: int, user: User):
+    _search_space_ownership_cache.pop((user.id, search_space_id), None)
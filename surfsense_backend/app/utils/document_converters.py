@@ -1,6 +1,37 @@
 import hashlib
 
 
+# Markdown formatter per Unstructured category, built once rather than per element
+MARKDOWN_FORMATTERS = {
+    "Formula": lambda x, element: f"```math\n{x}\n```",
+    "FigureCaption": lambda x, element: f"*Figure: {x}*",
+    "NarrativeText": lambda x, element: f"{x}\n\n",
+    "ListItem": lambda x, element: f"- {x}\n",
+    "Title": lambda x, element: f"# {x}\n\n",
+    "Address": lambda x, element: f"> {x}\n\n",
+    "EmailAddress": lambda x, element: f"`{x}`",
+    "Image": lambda x, element: f"![{x}]({x})",
+    "PageBreak": lambda x, element: "\n---\n",
+    "Table": lambda x, element: f"```html\n{element.metadata['text_as_html']}\n```",
+    "Header": lambda x, element: f"## {x}\n\n",
+    "Footer": lambda x, element: f"*{x}*\n\n",
+    "CodeSnippet": lambda x, element: f"```\n{x}\n```",
+    "PageNumber": lambda x, element: f"*Page {x}*\n\n",
+    "UncategorizedText": lambda x, element: f"{x}\n\n"
+}
+
+
+def _element_to_markdown(element) -> str:
+    element_category = element.metadata["category"]
+    content = element.page_content
+
+    if not content:
+        return ""
+
+    formatter = MARKDOWN_FORMATTERS.get(element_category)
+    return formatter(content, element) if formatter else content
+
+
 async def convert_element_to_markdown(element) -> str:
     """
     Convert an Unstructured element to markdown format based on its category.
@@ -11,32 +42,7 @@ async def convert_element_to_markdown(element) -> str:
     Returns:
         str: Markdown formatted string
     """
-    element_category = element.metadata["category"]
-    content = element.page_content
-
-    if not content:
-        return ""
-
-    markdown_mapping = {
-        "Formula": lambda x: f"```math\n{x}\n```",
-        "FigureCaption": lambda x: f"*Figure: {x}*",
-        "NarrativeText": lambda x: f"{x}\n\n",
-        "ListItem": lambda x: f"- {x}\n",
-        "Title": lambda x: f"# {x}\n\n",
-        "Address": lambda x: f"> {x}\n\n",
-        "EmailAddress": lambda x: f"`{x}`",
-        "Image": lambda x: f"![{x}]({x})",
-        "PageBreak": lambda x: "\n---\n",
-        "Table": lambda x: f"```html\n{element.metadata['text_as_html']}\n```",
-        "Header": lambda x: f"## {x}\n\n",
-        "Footer": lambda x: f"*{x}*\n\n",
-        "CodeSnippet": lambda x: f"```\n{x}\n```",
-        "PageNumber": lambda x: f"*Page {x}*\n\n",
-        "UncategorizedText": lambda x: f"{x}\n\n"
-    }
-
-    converter = markdown_mapping.get(element_category, lambda x: x)
-    return converter(content)
+    return _element_to_markdown(element)
 
 
 async def convert_document_to_markdown(elements):
@@ -49,14 +55,12 @@ async def convert_document_to_markdown(elements):
     Returns:
         str: Complete markdown document
     """
-    markdown_parts = []
-
-    for element in elements:
-        markdown_text = await convert_element_to_markdown(element)
-        if markdown_text:
-            markdown_parts.append(markdown_text)
-
-    return "".join(markdown_parts)
+    # Convert synchronously: awaiting a coroutine per element costs more than the formatting itself
+    return "".join(
+        markdown_text
+        for markdown_text in map(_element_to_markdown, elements)
+        if markdown_text
+    )
 
 
 def convert_chunks_to_langchain_documents(chunks):
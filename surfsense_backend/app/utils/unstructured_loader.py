@@ -0,0 +1,33 @@
+import gc
+
+
+def load_file_with_unstructured(file_path: str):
+    """
+    Parse a file into Unstructured elements. Runs inside a worker process.
+
+    Unstructured's "auto" strategy already picks the fast text layer for PDFs
+    with extractable text and OCR / hi_res for scanned PDFs and images.
+
+    Args:
+        file_path: Path of the file to parse
+
+    Returns:
+        List of LangChain Document elements
+    """
+    from langchain_unstructured import UnstructuredLoader
+
+    loader = UnstructuredLoader(
+        file_path,
+        mode="elements",
+        post_processors=[],
+        languages=["eng"],
+        include_orig_elements=False,
+        include_metadata=False,
+        strategy="auto",
+    )
+    docs = loader.load()
+
+    # Worker processes are long-lived; drop the parser's cyclic garbage before the next file
+    gc.collect()
+
+    return docs
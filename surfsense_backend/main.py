@@ -1,6 +1,11 @@
 import uvicorn
 import argparse
 import logging
+import os
+
+# "auto" uses uvloop when it is installed and falls back to asyncio otherwise;
+# set UVICORN_LOOP=asyncio to force the stdlib loop
+EVENT_LOOP = os.getenv("UVICORN_LOOP", "auto")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +22,7 @@ if __name__ == "__main__":
         "app.app:app",
         host="0.0.0.0",
         log_level="info",
+        loop=EVENT_LOOP,
         reload=args.reload,
         reload_dirs=["app"]
     )